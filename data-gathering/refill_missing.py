@@ -9,8 +9,9 @@ Usage:
     python refill_missing.py [--script scrape_details.py] [--headed] [--link-retries 5]
 
 Notes:
-- This script calls `scrape_details.py --start N --end N` for each page with missing data.
-- It runs them sequentially and prints a short summary. You can re-run with --headed to see the browser.
+- This script starts one `scrape_details.py --stdin-mode` process and pipes it the pages with
+  missing data (with the links of the incomplete rows), so a single browser is reused across them
+  and only those rows are re-fetched. You can re-run with --headed to see the browser.
 """
 from __future__ import annotations
 
@@ -20,7 +21,7 @@ import os
 import re
 import subprocess
 import sys
-from typing import Set
+from typing import Dict, Optional, Set
 
 BASE_DIR = os.path.dirname(__file__)
 OUT_DIR = os.path.join(BASE_DIR, "text-data")
@@ -31,8 +32,13 @@ MISSING_DESC = "__MISSING_DESCRIPTION__"
 PAGE_RE = re.compile(r"data_page(\d+)\.csv$")
 
 
-def find_pages_with_missing(out_dir: str) -> Set[int]:
-    pages = set()
+def find_pages_with_missing(out_dir: str) -> Dict[int, Optional[Set[str]]]:
+    """Map page numbers to the URLs of their data rows with missing fields.
+
+    A value of None means the whole page has to be re-scraped (unreadable, empty, bad header,
+    or an incomplete row without a URL).
+    """
+    pages: Dict[int, Optional[Set[str]]] = {}
     if not os.path.isdir(out_dir):
         print(f"Output directory not found: {out_dir}")
         return pages
@@ -49,36 +55,40 @@ def find_pages_with_missing(out_dir: str) -> Set[int]:
                 rows = list(reader)
         except Exception as e:
             print(f"Failed reading {path}: {e}")
-            pages.add(page_num)
+            pages[page_num] = None
             continue
 
         if len(rows) < 2:
-            pages.add(page_num)
+            pages[page_num] = None
             continue
 
         header = rows[0]
         # try to find indices for url,title,genres,description
         idx_map = {h.strip().lower(): i for i, h in enumerate(header)}
+        ui = idx_map.get("url")
         ti = idx_map.get("title")
         gi = idx_map.get("genres")
         di = idx_map.get("description")
-        if ti is None or gi is None or di is None:
-            pages.add(page_num)
+        if ui is None or ti is None or gi is None or di is None:
+            pages[page_num] = None
             continue
 
         for r in rows[1:]:
             # guard against short rows
+            url = r[ui].strip() if ui < len(r) else ""
             title = r[ti].strip() if ti < len(r) else ""
             genres = r[gi].strip() if gi < len(r) else ""
             desc = r[di].strip() if di < len(r) else ""
             if (not title) or (not genres) or (not desc) or title == MISSING_TITLE or desc == MISSING_DESC:
-                pages.add(page_num)
-                break
+                if not url:
+                    pages[page_num] = None
+                    break
+                pages.setdefault(page_num, set()).add(url)
 
     return pages
 
 
-def run_scrape_for_pages(pages: Set[int], script: str, headed: bool, link_retries: int, link_retry_wait: float) -> None:
+def run_scrape_for_pages(pages: Dict[int, Optional[Set[str]]], script: str, headed: bool, link_retries: int, link_retry_wait: float) -> None:
     if not pages:
         print("No pages with missing data found.")
         return
@@ -86,16 +96,28 @@ def run_scrape_for_pages(pages: Set[int], script: str, headed: bool, link_retrie
     pages_sorted = sorted(pages)
     print(f"Will re-run scrape_details for {len(pages_sorted)} pages: {pages_sorted[:10]}{('...' if len(pages_sorted)>10 else '')}")
 
-    for pnum in pages_sorted:
-        cmd = [sys.executable, script, "--start", str(pnum), "--end", str(pnum), "--link-retries", str(link_retries), "--link-retry-wait", str(link_retry_wait)]
-        if headed:
-            cmd.append("--headed")
-        print(f"Running: {' '.join(cmd)}")
-        try:
-            res = subprocess.run(cmd, check=False)
-            print(f"Exit code: {res.returncode}")
-        except Exception as e:
-            print(f"Failed to run scraper for page {pnum}: {e}")
+    cmd = [sys.executable, script, "--stdin-mode", "--link-retries", str(link_retries), "--link-retry-wait", str(link_retry_wait)]
+    if headed:
+        cmd.append("--headed")
+    print(f"Running: {' '.join(cmd)}")
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, text=True, encoding="utf-8")
+    except Exception as e:
+        print(f"Failed to run scraper for pages {pages_sorted}: {e}")
+        return
+
+    try:
+        # one line per page: the page number and the links whose rows need re-scraping;
+        # a bare page number re-scrapes the whole page
+        for pnum in pages_sorted:
+            urls = pages[pnum]
+            proc.stdin.write(f"{pnum}\n" if urls is None else f"{pnum} {','.join(sorted(urls))}\n")
+            proc.stdin.flush()
+        proc.stdin.close()
+    except BrokenPipeError:
+        print("Scraper exited before all pages were sent.")
+    res = proc.wait()
+    print(f"Exit code: {res}")
 
 
 def main() -> None:
@@ -13,7 +13,6 @@ Notes:
 from __future__ import annotations
 
 import argparse
-import csv
 import random
 import time
 import os
@@ -21,6 +20,8 @@ from typing import List
 
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
+from scrape_common import CONTEXT_OPTIONS, backoff_delay, is_blocked_request, write_csv
+
 
 # The selector provided by the user
 DEFAULT_SELECTOR = (
@@ -28,6 +29,36 @@ DEFAULT_SELECTOR = (
 	" div:nth-child(1) > div:nth-child(1) > a:nth-child(1)"
 )
 
+# scrolls down in 5 steps to trigger lazy loading, returning early once 10 items are present
+SCROLL_SCRIPT = """async (selector) => {
+	for (let i = 1; i <= 5; i++) {
+		if (document.querySelectorAll(selector).length >= 10) break;
+		window.scrollTo(0, document.body.scrollHeight * i / 5);
+		await new Promise(r => setTimeout(r, 200));
+	}
+}"""
+
+# true once the search results are fully rendered
+ENOUGH_ITEMS_JS = "s => document.querySelectorAll(s).length >= 10"
+
+# search pages visited before the browser context is closed and recreated
+PAGES_PER_CONTEXT = 20
+
+
+def block_unneeded_requests(route) -> None:
+	if is_blocked_request(route.request):
+		route.abort()
+	else:
+		route.continue_()
+
+
+def open_context(browser):
+	context = browser.new_context(**CONTEXT_OPTIONS)
+	context.route("**/*", block_unneeded_requests)
+	page = context.new_page()
+	page.set_default_timeout(15000)
+	return context, page
+
 
 def scrape_filmweb_links(
 	target_count: int = 100,
@@ -46,6 +77,8 @@ def scrape_filmweb_links(
 	"""
 
 	collected: List[str] = []
+	# mirrors `collected` for O(1) membership checks
+	seen: set[str] = set()
 
 	# determine directory where per-page files should be written
 	# use a `links/` subfolder next to provided output (or next to script) per user request
@@ -59,27 +92,29 @@ def scrape_filmweb_links(
 		if not page_links:
 			return
 		filename = os.path.join(output_dir, f"page{page_number}.csv")
-		with open(filename, "w", newline="", encoding="utf-8") as f:
-			writer = csv.writer(f)
-			writer.writerow(["url"])
-			for u in page_links:
-				writer.writerow([u])
+		write_csv(filename, ["url"], ([u] for u in page_links))
 
 	with sync_playwright() as p:
 		browser = p.chromium.launch(headless=headless)
-		context = browser.new_context()
-		page = context.new_page()
-		page.set_default_timeout(15000)
+		context, page = open_context(browser)
 
 		page_num = start_page
 		while len(collected) < target_count:
+			# recycle the context periodically to drop accumulated cookies, caches and workers
+			if page_num != start_page and (page_num - start_page) % PAGES_PER_CONTEXT == 0:
+				try:
+					context.close()
+				except Exception:
+					pass
+				context, page = open_context(browser)
+
 			url = f"https://www.filmweb.pl/search#/film?page={page_num}"
 			print(f"Visiting {url}")
 			attempt = 0
-			elements = []
+			page_links: List[str] = []
 			while attempt <= retries:
 				try:
-					page.goto(url, wait_until="networkidle")
+					page.goto(url, wait_until="domcontentloaded")
 				except PlaywrightTimeoutError:
 					print(f"Timeout loading page {page_num} (attempt {attempt+1}).")
 					# try reload and continue to retry
@@ -88,57 +123,46 @@ def scrape_filmweb_links(
 					except Exception:
 						pass
 					attempt += 1
-					time.sleep(retry_wait)
+					# timeouts usually mean throttling or a slow server, so back off hard
+					time.sleep(backoff_delay(retry_wait, attempt))
 					continue
 
-				# scroll to trigger lazy load
-				for i in range(1, 6):
-					page.evaluate(f"window.scrollTo(0, document.body.scrollHeight * {i} / 5)")
-					time.sleep(0.2)
+				# scroll to trigger lazy load (single round-trip, stops once enough items exist)
+				page.evaluate(SCROLL_SCRIPT, selector)
 
+				# wait for all 10 results, not just the first; on timeout read whatever rendered
+				# and let the short-page handling below decide
 				try:
-					page.wait_for_selector(selector, timeout=5000)
+					page.wait_for_function(ENOUGH_ITEMS_JS, arg=selector, timeout=5000)
 				except PlaywrightTimeoutError:
-					print(f"Selector not found on page {page_num} (attempt {attempt+1}).")
-					elements = []
-					attempt += 1
-					time.sleep(retry_wait)
-					continue
+					print(f"Fewer than 10 items rendered on page {page_num} (attempt {attempt+1}).")
 
-				elements = page.query_selector_all(selector)
-				if len(elements) >= 10:
+				# e.href is already absolute, resolved by the browser
+				page_links = page.eval_on_selector_all(selector, "els => els.map(e => e.href).filter(Boolean).slice(0, 10)")
+				if len(page_links) >= 10:
 					break
 				# otherwise retry
 				attempt += 1
-				print(f"Only {len(elements)} items found on page {page_num} (attempt {attempt}). Retrying...")
+				print(f"Only {len(page_links)} items found on page {page_num} (attempt {attempt}). Retrying...")
 				try:
 					page.reload()
 				except Exception:
 					pass
-				time.sleep(retry_wait)
+				time.sleep(backoff_delay(retry_wait, attempt))
 
 			# after retry loop, proceed with whatever was found (may be <10)
-			if not elements:
+			if not page_links:
 				print(f"No elements found on page {page_num} after {retries} retries. Stopping.")
 				break
 
-			# extract urls for this page
-			page_links: List[str] = []
-			for el in elements[:10]:
-				href = el.get_attribute("href")
-				if not href:
-					continue
-				if href.startswith("/"):
-					href = "https://www.filmweb.pl" + href
-				page_links.append(href)
-
 			# save this page's links immediately
 			save_page_file(page_links, page_num)
 			print(f"Saved {len(page_links)} links to page{page_num}.csv")
 
 			# add to global collection (unique)
 			for u in page_links:
-				if u not in collected:
+				if u not in seen:
+					seen.add(u)
 					collected.append(u)
 					print(f"Collected: {u}")
 					if len(collected) >= target_count:
@@ -158,11 +182,7 @@ def scrape_filmweb_links(
 
 
 def save_to_csv(links: List[str], output_path: str) -> None:
-	with open(output_path, "w", newline="", encoding="utf-8") as f:
-		writer = csv.writer(f)
-		writer.writerow(["url"])
-		for l in links:
-			writer.writerow([l])
+	write_csv(output_path, ["url"], ([l] for l in links))
 
 
 def main() -> None:
@@ -173,7 +193,7 @@ def main() -> None:
 	parser.add_argument("--selector", type=str, default=DEFAULT_SELECTOR, help="CSS selector for links")
 	parser.add_argument("--headed", action="store_true", help="Run browser headed (visible)")
 	parser.add_argument("--retries", type=int, default=3, help="Number of retries per page if fewer than 10 links are found")
-	parser.add_argument("--retry-wait", type=float, default=1.0, help="Seconds to wait between retries")
+	parser.add_argument("--retry-wait", type=float, default=1.0, help="Base seconds to wait between retries (grows exponentially)")
 
 	args = parser.parse_args()
 
@@ -0,0 +1,57 @@
+"""
+scrape_common.py
+
+Helpers shared by `scrape.py`, `scrape_details.py` and `refill_missing.py`: request blocking
+rules, browser context options, retry backoff and CSV reading/writing.
+
+Kept free of Playwright imports so the sync and async scrapers (and tools that never start
+a browser) can all use it.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import random
+from typing import Iterable, List, Sequence
+
+BASE_DIR = os.path.dirname(__file__)
+LINKS_DIR = os.path.join(BASE_DIR, "links")
+
+# upper bound for a single retry backoff, in seconds
+MAX_BACKOFF = 30.0
+
+# resource types and tracker hosts we never read; aborting them keeps page loads light
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+BLOCKED_HOSTS = ("doubleclick", "google-analytics", "hotjar")
+
+# keyword arguments for `browser.new_context()`; a small viewport keeps layout cheap
+CONTEXT_OPTIONS = {"java_script_enabled": True, "viewport": {"width": 800, "height": 600}}
+
+
+def backoff_delay(base: float, attempt: int) -> float:
+    """Exponential backoff with up to 50% jitter, capped at MAX_BACKOFF."""
+    return min(MAX_BACKOFF, base * (2 ** attempt) * (1 + random.random() * 0.5))
+
+
+def is_blocked_request(request) -> bool:
+    return request.resource_type in BLOCKED_RESOURCE_TYPES or any(h in request.url for h in BLOCKED_HOSTS)
+
+
+def write_csv(path: str, header: Sequence[str], rows: Iterable[Sequence[str]]) -> None:
+    # build the whole file in memory so it goes out in a single write
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    writer.writerows(rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(buf.getvalue())
+
+
+def read_links_for_page(page_num: int, links_dir: str = LINKS_DIR) -> List[str]:
+    path = os.path.join(links_dir, f"page{page_num}.csv")
+    if not os.path.isfile(path):
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return [r[0].strip() for r in rows[1:] if r]
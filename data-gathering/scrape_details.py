@@ -5,172 +5,438 @@ scrape_details.py
 Iterates CSV files in `links/` (page1.csv, page2.csv, ...). For each link in a page file:
 - open the movie page and extract title from selector: ".filmCoverSection__title "
 - extract genres from selector: ".filmPosterSection__buttons > div[data-tag-type=\"rankingGenre\"] > a"
-- open movie details page by appending "/descs" to the URL and extract description from selector:
+- extract the description from the movie page if present, otherwise fetch the details page by
+  appending "/descs" to the URL (plain HTTP request, parsed with BeautifulSoup) and extract it from selector:
   "div.descriptionSection__item[data-is-default='true'] p.descriptionSection__text.descriptionSection__text--full"
 
 Writes per-page results into directory `test data/` as CSV files named `data_pageN.csv` with columns: url,title,genres,description
 
+Links are processed concurrently by a pool of browser contexts (see `--pool-size`).
+
 Usage:
     python scrape_details.py --start 1 --end 1000 --headed
+    python scrape_details.py --pages 3,7,42
+    python scrape_details.py --pages 3 --only-urls https://www.filmweb.pl/film/...
+    printf "3\n7\n" | python scrape_details.py --stdin-mode
 
 Note: requires Playwright browsers installed (`python -m playwright install`).
 """
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
 import os
-import time
-from typing import List
+import sys
+import threading
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright, Error as PlaywrightError
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from scrape_common import CONTEXT_OPTIONS, backoff_delay, is_blocked_request, read_links_for_page, write_csv
 
 BASE_DIR = os.path.dirname(__file__)
-LINKS_DIR = os.path.join(BASE_DIR, "links")
 OUT_DIR = os.path.join(BASE_DIR, "text-data")
 
 TITLE_SELECTOR = ".filmCoverSection__title "
 GENRE_SELECTOR = '.filmPosterSection__buttons > div[data-tag-type="rankingGenre"]'
 DESC_SELECTOR = "div.descriptionSection__item[data-is-default='true'] p.descriptionSection__text.descriptionSection__text--full"
 
+# number of concurrent browser contexts (each with its own page)
+POOL_SIZE = 8
+# links visited by a worker before its context is closed and recreated
+PAGES_PER_CONTEXT = 50
+
 
 def ensure_out_dir() -> None:
     os.makedirs(OUT_DIR, exist_ok=True)
 
 
-def read_links_for_page(page_num: int) -> List[str]:
-    path = os.path.join(LINKS_DIR, f"page{page_num}.csv")
+def write_page_results(page_num: int, rows: List[List[str]]) -> None:
+    out_path = os.path.join(OUT_DIR, f"data_page{page_num}.csv")
+    write_csv(out_path, ["url", "title", "genres", "description"], rows)
+
+
+def read_page_results(page_num: int) -> Dict[str, List[str]]:
+    path = os.path.join(OUT_DIR, f"data_page{page_num}.csv")
     if not os.path.isfile(path):
-        return []
-    links: List[str] = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        rows = list(reader)
-        for r in rows[1:]:
-            if r:
-                links.append(r[0].strip())
-    return links
+        return {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+    except Exception:
+        return {}
+    return {r[0].strip(): (r + [""] * 4)[:4] for r in rows[1:] if r}
 
 
-def write_page_results(page_num: int, rows: List[List[str]]) -> None:
-    out_path = os.path.join(OUT_DIR, f"data_page{page_num}.csv")
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["url", "title", "genres", "description"])
-        for r in rows:
-            writer.writerow(r)
+def merge_page_results(page_num: int, links: List[str], new_rows: List[List[str]]) -> List[List[str]]:
+    """Overlay freshly scraped rows on the existing page file, in link order."""
+    by_url = read_page_results(page_num)
+    by_url.update((r[0], r) for r in new_rows)
+    return [by_url.get(url, [url, "", "", ""]) for url in links]
 
 
-def extract_text_or_empty(el):
+async def extract_text_or_empty(el) -> str:
     try:
-        return el.inner_text().strip()
+        return (await el.inner_text()).strip()
     except Exception:
         return ""
 
 
-def scrape_range(start: int, end: int, headless: bool = True, link_retries: int = 3, link_retry_wait: float = 0.5) -> None:
-    ensure_out_dir()
+async def extract_title(page) -> str:
+    try:
+        el = await page.query_selector(TITLE_SELECTOR)
+        return await extract_text_or_empty(el) if el else ""
+    except Exception:
+        return ""
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        context = browser.new_context()
-        page = context.new_page()
-        page.set_default_timeout(15000)
 
-        for page_num in range(start, end + 1):
-            links = read_links_for_page(page_num)
-            if not links:
-                print(f"No links for page{page_num}. Skipping.")
-                continue
+async def extract_genres(page) -> str:
+    try:
+        return await page.eval_on_selector_all(
+            GENRE_SELECTOR, "els => els.map(e => e.innerText.trim()).filter(Boolean).join(';')"
+        )
+    except Exception:
+        return ""
 
-            results: List[List[str]] = []
-            for url in links:
-                title = ""
-                genres_str = ""
-                desc_text = ""
-
-                attempt = 0
-                success = False
-                while attempt <= link_retries:
-                    try:
-                        print(f"Visiting {url} (attempt {attempt+1})")
-                        page.goto(url, wait_until="networkidle")
-                    except PlaywrightTimeoutError:
-                        print(f"Timeout loading {url} (attempt {attempt+1})")
-                        attempt += 1
-                        time.sleep(link_retry_wait)
-                        continue
-
-                    # title
-                    try:
-                        el = page.query_selector(TITLE_SELECTOR)
-                        title = extract_text_or_empty(el) if el else ""
-                    except Exception:
-                        title = ""
-
-                    # genres (may be multiple)
-                    try:
-                        genre_els = page.query_selector_all(GENRE_SELECTOR)
-                        genres = [extract_text_or_empty(g) for g in genre_els]
-                        genres_str = ";".join([g for g in genres if g])
-                    except Exception:
-                        genres_str = ""
-
-                    # go to /descs for description
-                    try:
-                        desc_url = url.rstrip("/") + "/descs"
-                        page.goto(desc_url, wait_until="networkidle")
-                        # small delay to allow text to render
-                        time.sleep(0.3)
-                        desc_el = page.query_selector(DESC_SELECTOR)
-                        desc_text = extract_text_or_empty(desc_el) if desc_el else ""
-                        desc_text = desc_text.replace("\n", " ").replace("\r", " ").strip()
-                    except PlaywrightTimeoutError:
-                        print(f"Timeout loading desc page for {url} (attempt {attempt+1})")
-                    except Exception:
-                        pass
-
-                    # if we have title and genres and desc, count as success
-                    if title and genres_str and desc_text:
-                        success = True
-                        break
-
-                    attempt += 1
-                    print(f"Retrying {url} after {link_retry_wait}s...")
-                    time.sleep(link_retry_wait)
-
-                if not success:
-                    print(f"Failed to extract details for {url} after {link_retries} retries")
-
-                results.append([url, title, genres_str, desc_text])
-                # polite delay
-                time.sleep(0.4)
 
-            write_page_results(page_num, results)
-            print(f"Wrote {len(results)} records to data_page{page_num}.csv")
+async def fetch_desc(page, url: str) -> str:
+    """Return the description, fetching `url/descs` only when the current page lacks it.
 
+    The /descs page is requested over plain HTTP (sharing the context's cookies) and parsed
+    with BeautifulSoup, which skips rendering and script execution for that hop.
+    """
+    desc_el = await page.query_selector(DESC_SELECTOR)
+    desc_text = await extract_text_or_empty(desc_el) if desc_el else ""
+    if not desc_text:
+        desc_url = url.rstrip("/") + "/descs"
+        resp = await page.context.request.get(desc_url, timeout=8000)
         try:
-            browser.close()
+            if not resp.ok:
+                raise PlaywrightError(f"HTTP {resp.status} for {desc_url}")
+            html = await resp.text()
+        finally:
+            # release the body now instead of at the next context recycle
+            await resp.dispose()
+        soup = BeautifulSoup(html, "lxml")
+        el = soup.select_one(DESC_SELECTOR)
+        desc_text = el.get_text(" ", strip=True) if el else ""
+    return desc_text.replace("\n", " ").replace("\r", " ").strip()
+
+
+async def scrape_link(page, url: str, link_retries: int, link_retry_wait: float) -> List[str]:
+    title = ""
+    genres_str = ""
+    desc_text = ""
+
+    attempt = 0
+    success = False
+    while attempt <= link_retries:
+        try:
+            print(f"Visiting {url} (attempt {attempt+1})")
+            await page.goto(url, wait_until="domcontentloaded")
+        except PlaywrightError as e:
+            # timeouts as well as network errors (connection reset, aborted navigation, ...)
+            print(f"Failed loading {url} (attempt {attempt+1}): {e}")
+            attempt += 1
+            await asyncio.sleep(backoff_delay(link_retry_wait, attempt))
+            continue
+
+        # domcontentloaded doesn't mean the fields are rendered yet; wait for them before reading
+        waits = await asyncio.gather(
+            page.wait_for_selector(TITLE_SELECTOR),
+            page.wait_for_selector(GENRE_SELECTOR),
+            return_exceptions=True,
+        )
+        if any(isinstance(w, Exception) for w in waits):
+            print(f"Title/genres not rendered on {url} (attempt {attempt+1})")
+
+        # title and genres (may be multiple) live on the same page
+        title, genres_str = await asyncio.gather(extract_title(page), extract_genres(page))
+
+        # description (from /descs unless already on the movie page)
+        desc_failed = False
+        try:
+            desc_text = await fetch_desc(page, url)
+        except PlaywrightError as e:
+            print(f"Failed loading desc page for {url} (attempt {attempt+1}): {e}")
+            desc_failed = True
         except Exception:
             pass
 
+        # if we have title and genres and desc, count as success
+        if title and genres_str and desc_text:
+            success = True
+            break
+
+        attempt += 1
+        # back off on timeouts/HTTP errors; missing fields get a short fixed wait
+        wait = backoff_delay(link_retry_wait, attempt) if desc_failed else link_retry_wait
+        print(f"Retrying {url} after {wait:.1f}s...")
+        await asyncio.sleep(wait)
+
+    if not success:
+        print(f"Failed to extract details for {url} after {link_retries} retries")
+
+    return [url, title, genres_str, desc_text]
+
+
+async def block_unneeded_requests(route) -> None:
+    if is_blocked_request(route.request):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def open_context(browser):
+    context = await browser.new_context(**CONTEXT_OPTIONS)
+    await context.route("**/*", block_unneeded_requests)
+    page = await context.new_page()
+    page.set_default_timeout(8000)
+    return context, page
+
+
+async def run_pool(
+    produce: Callable[[Callable[[int, Optional[Set[str]]], None]], Awaitable[None]],
+    headless: bool = True,
+    link_retries: int = 3,
+    link_retry_wait: float = 0.5,
+    pool_size: int = POOL_SIZE,
+) -> None:
+    """Scrape the pages queued by `produce` with `pool_size` long-lived workers.
+
+    `produce` gets an `enqueue(page_num, only_urls)` callback that queues every link of
+    the page as a `(page_num, index, url)` job; once it returns, the workers drain the
+    queue and stop. The browser is launched only once the first job is queued. Each worker
+    owns its own context/page and pulls jobs from the shared queue. A page file is written
+    as soon as all of its queued links are done, keeping the original link order.
+
+    With `only_urls`, only those links of the page are scraped and their rows are merged
+    into the existing page file; a page without any listed link is skipped.
+    """
+    if pool_size < 1:
+        raise ValueError(f"pool_size must be at least 1, got {pool_size}")
+    ensure_out_dir()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    first_job = asyncio.Event()
+    pending: Dict[int, int] = {}
+    merge_links: Dict[int, List[str]] = {}
+    results: Dict[int, List[Tuple[int, List[str]]]] = defaultdict(list)
+
+    def enqueue(page_num: int, only_urls: Optional[Set[str]] = None) -> None:
+        links = read_links_for_page(page_num)
+        if not links:
+            print(f"No links for page{page_num}. Skipping.")
+            return
+        todo = [(idx, url) for idx, url in enumerate(links) if only_urls is None or url in only_urls]
+        if not todo:
+            return
+        if only_urls is not None:
+            merge_links[page_num] = links
+        pending[page_num] = pending.get(page_num, 0) + len(todo)
+        for idx, url in todo:
+            queue.put_nowait((page_num, idx, url))
+        first_job.set()
+
+    async def producer() -> None:
+        try:
+            await produce(enqueue)
+        finally:
+            # one stop marker per worker, queued behind all real jobs
+            for _ in range(pool_size):
+                queue.put_nowait(None)
+
+    async def worker(browser) -> None:
+        context = page = None
+        visited = 0
+        try:
+            while True:
+                job = await queue.get()
+                if job is None:
+                    return
+                page_num, idx, url = job
+
+                try:
+                    # recycle periodically to drop accumulated browser state
+                    if context is not None and visited % PAGES_PER_CONTEXT == 0:
+                        old_context, context = context, None
+                        try:
+                            await old_context.close()
+                        except Exception:
+                            pass
+                    # open lazily; after a failed open the next job tries again
+                    if context is None:
+                        context, page = await open_context(browser)
+                    row = await scrape_link(page, url, link_retries, link_retry_wait)
+                except Exception as e:
+                    # one broken link (or context) must not take down the pool and the pages still in flight
+                    print(f"Error scraping {url}: {e}")
+                    row = [url, "", "", ""]
+                visited += 1
+
+                results[page_num].append((idx, row))
+                pending[page_num] -= 1
+                if pending[page_num] == 0:
+                    del pending[page_num]
+                    rows = [r for _, r in sorted(results.pop(page_num))]
+                    if page_num in merge_links:
+                        rows = merge_page_results(page_num, merge_links.pop(page_num), rows)
+                    write_page_results(page_num, rows)
+                    print(f"Wrote {len(rows)} records to data_page{page_num}.csv")
+
+                # polite delay
+                await asyncio.sleep(0.4)
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+
+    # start the browser only once there is something to scrape
+    producer_task = asyncio.ensure_future(producer())
+    first_job_task = asyncio.ensure_future(first_job.wait())
+    try:
+        await asyncio.wait({producer_task, first_job_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        first_job_task.cancel()
+    if not first_job.is_set():
+        await producer_task
+        return
+
+    async with async_playwright() as p:
+        tasks = [producer_task]
+        try:
+            browser = await p.chromium.launch(headless=headless)
+            tasks.extend(asyncio.ensure_future(worker(browser)) for _ in range(pool_size))
+            await asyncio.gather(*tasks)
+        finally:
+            # if anything failed, don't leave the producer waiting for input that no one will handle
+            for t in tasks:
+                t.cancel()
+
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+
+async def scrape_pages(
+    page_nums: Iterable[int],
+    headless: bool = True,
+    link_retries: int = 3,
+    link_retry_wait: float = 0.5,
+    pool_size: int = POOL_SIZE,
+    only_urls: Optional[Set[str]] = None,
+) -> None:
+    """Scrape the given page numbers (optionally only `only_urls`) with one worker pool."""
+
+    async def produce(enqueue) -> None:
+        for page_num in page_nums:
+            enqueue(page_num, only_urls)
+
+    await run_pool(produce, headless, link_retries, link_retry_wait, pool_size)
+
+
+async def scrape_from_stdin(
+    headless: bool = True,
+    link_retries: int = 3,
+    link_retry_wait: float = 0.5,
+    pool_size: int = POOL_SIZE,
+    only_urls: Optional[Set[str]] = None,
+) -> None:
+    """Scrape pages as their numbers arrive on stdin, with one browser and worker pool throughout.
+
+    Each line is a page number, optionally followed by whitespace and comma-separated links
+    to re-scrape for that page (same meaning as `--only-urls`, overriding it for that line).
+    Links from all lines share one queue, so workers keep busy across pages; EOF stops them
+    once the queue is drained.
+    """
+    loop = asyncio.get_running_loop()
+    lines: asyncio.Queue = asyncio.Queue()
+
+    def pump_stdin() -> None:
+        try:
+            for line in sys.stdin:
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+            loop.call_soon_threadsafe(lines.put_nowait, None)
+        except RuntimeError:
+            # the event loop is already closed; nothing is listening any more
+            pass
+
+    # a daemon thread, so a read blocked on stdin never keeps the process alive once
+    # the pool has finished or failed
+    threading.Thread(target=pump_stdin, daemon=True).start()
+
+    async def read_stdin(enqueue) -> None:
+        while True:
+            line = await lines.get()
+            if line is None:
+                return
+            parts = line.split(maxsplit=1)
+            if not parts:
+                continue
+            try:
+                page_num = int(parts[0])
+            except ValueError:
+                print(f"Ignoring invalid input line: {line.strip()!r}")
+                continue
+            enqueue(page_num, parse_urls(parts[1]) if len(parts) > 1 else only_urls)
+
+    await run_pool(read_stdin, headless, link_retries, link_retry_wait, pool_size)
+
+
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def parse_pages(value: str) -> List[int]:
+    return [int(p) for p in value.split(",") if p.strip()]
+
+
+def parse_urls(value: str) -> Set[str]:
+    return {u.strip() for u in value.split(",") if u.strip()}
+
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--start", type=int, default=1)
     parser.add_argument("--end", type=int, default=1000)
+    parser.add_argument("--pages", type=parse_pages, default=None, help="Comma-separated page numbers (overrides --start/--end)")
     parser.add_argument("--headed", action="store_true")
     parser.add_argument("--link-retries", type=int, default=3, help="Retries per link when fields are missing")
     parser.add_argument("--link-retry-wait", type=float, default=0.5, help="Seconds to wait between link retries")
+    parser.add_argument("--pool-size", type=positive_int, default=POOL_SIZE, help="Number of concurrent browser contexts")
+    parser.add_argument("--only-urls", type=parse_urls, default=None, help="Comma-separated links to re-scrape; other rows are kept")
+    parser.add_argument("--stdin-mode", action="store_true", help="Read page numbers from stdin (one per line) with a single browser")
     args = parser.parse_args()
 
-    scrape_range(
-        args.start,
-        args.end,
+    if args.stdin_mode:
+        asyncio.run(scrape_from_stdin(
+            headless=not args.headed,
+            link_retries=args.link_retries,
+            link_retry_wait=args.link_retry_wait,
+            pool_size=args.pool_size,
+            only_urls=args.only_urls,
+        ))
+        return
+
+    page_nums = args.pages if args.pages is not None else range(args.start, args.end + 1)
+
+    asyncio.run(scrape_pages(
+        page_nums,
         headless=not args.headed,
         link_retries=args.link_retries,
         link_retry_wait=args.link_retry_wait,
-    )
+        pool_size=args.pool_size,
+        only_urls=args.only_urls,
+    ))
 
 
 if __name__ == "__main__":